@@ -27,15 +27,20 @@ from fastapi.routing import APIRouter
 from fastapi_etag.dependency import CacheHit
 from more_itertools import chunked
 from oauth2_lib.fastapi import OIDCUserModel
-from sqlalchemy.orm import contains_eager, defer, joinedload
+from sqlalchemy.orm import contains_eager
 from sqlalchemy.sql import expression
 from sqlalchemy.sql.functions import count
 from starlette.responses import Response
 
 from orchestrator.api.error_handling import raise_status
-from orchestrator.api.helpers import VALID_SORT_KEYS, enrich_process
+from orchestrator.api.helpers import (
+    PROCESS_LIST_COLUMNS,
+    VALID_SORT_KEYS,
+    enrich_process,
+    process_subscriptions_by_pid,
+)
 from orchestrator.config.assignee import Assignee
-from orchestrator.db import EngineSettingsTable, ProcessSubscriptionTable, ProcessTable, SubscriptionTable, db
+from orchestrator.db import EngineSettingsTable, ProcessSubscriptionTable, ProcessTable, db
 from orchestrator.db.filters import Filter
 from orchestrator.db.filters.process import filter_processes
 from orchestrator.schemas import (
@@ -259,14 +264,9 @@ def processes_filterable(
     _filter: Union[List[str], None] = filter.split(",") if filter else None
     logger.info("processes_filterable() called", range=_range, sort=_sort, filter=_filter)
 
-    # the joinedload on ProcessSubscriptionTable.subscription via ProcessBaseSchema.process_subscriptions prevents a query for every subscription later.
+    # Only select the listed columns, the subscriptions of the processes are fetched for the whole page later on.
     # tracebacks are not presented in the list of processes and can be really large.
-    query = ProcessTable.query.options(
-        joinedload(ProcessTable.process_subscriptions)
-        .joinedload(ProcessSubscriptionTable.subscription)
-        .joinedload(SubscriptionTable.product),
-        defer("traceback"),
-    )
+    query = ProcessTable.query.with_entities(*PROCESS_LIST_COLUMNS)
 
     if _filter is not None:
         if len(_filter) == 0 or (len(_filter) % 2) > 0:
@@ -301,13 +301,13 @@ def processes_filterable(
 
         response.headers["Content-Range"] = f"processes {range_start}-{range_end}/{total}"
 
-    results = query.all()
+    results = db.session.execute(query.statement).mappings().all()
 
     # Calculate a CRC32 checksum of all the process id's and last_modified_at dates in order as entity tag
     checksum = 0
     for p in results:
-        checksum = zlib.crc32(p.pid.bytes, checksum)
-        last_modified_as_bytes = struct.pack("d", p.last_modified_at.timestamp())
+        checksum = zlib.crc32(p["pid"].bytes, checksum)
+        last_modified_as_bytes = struct.pack("d", p["last_modified_at"].timestamp())
         checksum = zlib.crc32(last_modified_as_bytes, checksum)
 
     entity_tag = hex(checksum)
@@ -318,7 +318,8 @@ def processes_filterable(
     if if_none_match == entity_tag:
         raise CacheHit(HTTPStatus.NOT_MODIFIED, headers=dict(response.headers))
 
-    return [asdict(enrich_process(p)) for p in results]
+    subscriptions = process_subscriptions_by_pid([p["pid"] for p in results])
+    return [asdict(enrich_process(p, subscriptions[p["pid"]])) for p in results]
 
 
 if app_settings.ENABLE_WEBSOCKETS:
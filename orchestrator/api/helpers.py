@@ -12,24 +12,29 @@
 # limitations under the License.
 
 import functools
+import operator
+import re
+from collections import defaultdict
 from dataclasses import dataclass
 from datetime import datetime
 from http import HTTPStatus
 from shlex import shlex
-from typing import Any, Generator, List, Optional, Union
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple, Union
 from uuid import UUID
 
-from more_itertools import chunked, first
-from sqlalchemy import String, cast, func
+from more_itertools import chunked
+from pydantic import BaseModel
+from sqlalchemy import Column, String, cast, exists, func, inspect, select
 from sqlalchemy.orm import Query
 from sqlalchemy.sql import expression
+from sqlalchemy.sql.elements import UnaryExpression
 from starlette.responses import Response
 from structlog import get_logger
 
 from orchestrator.api.error_handling import raise_status
-from orchestrator.db import ProcessTable, ProductTable, SubscriptionTable
+from orchestrator.db import ProcessSubscriptionTable, ProcessTable, ProductTable, SubscriptionTable, db
 from orchestrator.db.models import SubscriptionSearchView
-from orchestrator.domain.base import SubscriptionModel
+from orchestrator.domain.base import DomainModel, SubscriptionModel
 
 logger = get_logger(__name__)
 
@@ -38,7 +43,15 @@ def _quote_if_kv_pair(token: str) -> str:
     return f'"{token}"' if ":" in token else token
 
 
+SHLEX_WHITESPACE = re.compile(f"[{re.escape(shlex().whitespace)}]+")
+
+
+@functools.lru_cache(maxsize=1024)
 def _process_text_query(q: str) -> str:
+    if not any(char in q for char in '":#'):
+        # Nothing to quote (and no shlex comments), tokenizing would only normalize shlex's whitespace
+        return " ".join(token for token in SHLEX_WHITESPACE.split(q) if token)
+
     quote = '"'
     if q.count(quote) % 2 == 1:
         q += quote  # Add missing closing quote
@@ -52,6 +65,113 @@ def _process_text_query(q: str) -> str:
         return q
 
 
+TRUTHY_VALUES = frozenset({"yes", "y", "ye", "true", "1", "ja", "insync"})
+
+
+def _insync_filter(query: Query, value: str) -> Query:
+    value_as_bool = value.lower() in TRUTHY_VALUES
+    return query.filter(SubscriptionTable.insync.is_(value_as_bool))
+
+
+def _lower_split(value: str) -> Tuple[str, ...]:
+    return tuple(value.lower().split("-"))
+
+
+def _tag_filter(query: Query, value: str) -> Query:
+    return query.filter(func.lower(ProductTable.tag).in_(_lower_split(value)))
+
+
+def _product_filter(query: Query, value: str) -> Query:
+    return query.filter(func.lower(ProductTable.name).in_(_lower_split(value)))
+
+
+def _status_filter(query: Query, value: str) -> Query:
+    return query.filter(SubscriptionTable.status.in_(_lower_split(value)))
+
+
+def _organisation_filter(query: Query, value: str) -> Query:
+    try:
+        value_as_uuid = UUID(value)
+    except (ValueError, AttributeError):
+        msg = "Not a valid customer_id, must be a UUID: '{value}'"
+        logger.debug(msg)
+        raise_status(HTTPStatus.BAD_REQUEST, msg)
+    return query.filter(SubscriptionTable.customer_id == value_as_uuid)
+
+
+def _tsv_filter(query: Query, value: str) -> Query:
+    # Quote key:value tokens. This will use the FOLLOWED BY operator (https://www.postgresql.org/docs/13/textsearch-controls.html)
+    processed_text_query = _process_text_query(value)
+
+    logger.debug("Running full-text search query:", value=processed_text_query)
+    # Filter with a semi-join so multiple full-text filters don't join the search view more than once
+    # TODO: Make 'websearch_to_tsquery' into a sqlalchemy extension
+    return query.filter(
+        exists().where(
+            SubscriptionSearchView.subscription_id == SubscriptionTable.subscription_id,
+            func.websearch_to_tsquery("simple", processed_text_query).op("@@")(SubscriptionSearchView.tsv),
+        )
+    )
+
+
+SUBSCRIPTION_FILTER_FUNCTIONS_BY_FIELD: Dict[str, Callable[[Query, str], Query]] = {
+    "insync": _insync_filter,
+    "tags": _tag_filter,  # For node and port selector form widgets
+    "tag": _tag_filter,  # For React table 7
+    "product": _product_filter,
+    "status": _status_filter,  # For React table 7
+    "statuses": _status_filter,  # For port subscriptions
+    "organisation": _organisation_filter,
+    "tsv": _tsv_filter,
+}
+
+# Filters that accept multiple `-` separated values
+MULTI_VALUE_FILTER_FIELDS = frozenset({"tags", "tag", "product", "status", "statuses"})
+
+# Comparison filters are passed as `<column>_<suffix>`, e.g. `end_date_gt`
+COMPARISON_OPERATORS_BY_SUFFIX: Dict[str, Callable[[Any, Any], Any]] = {
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "ne": operator.ne,
+}
+
+SUBSCRIPTION_COLUMNS: Dict[str, Column] = {column.key: column for column in inspect(SubscriptionTable).columns}
+
+SUBSCRIPTION_SORT_COLUMNS: Dict[str, Column] = {
+    **SUBSCRIPTION_COLUMNS,
+    "product": ProductTable.name,
+    "tag": ProductTable.tag,
+}
+
+SORT_DIRECTIONS: Dict[str, Callable[[Column], UnaryExpression]] = {"ASC": expression.asc, "DESC": expression.desc}
+
+
+def _filter_subscriptions(query: Query, field: str, value: str) -> Query:
+    if filter_function := SUBSCRIPTION_FILTER_FUNCTIONS_BY_FIELD.get(field):
+        return filter_function(query, value)
+
+    column_name, _, suffix = field.rpartition("_")
+    compare = COMPARISON_OPERATORS_BY_SUFFIX.get(suffix)
+    if compare and column_name in SUBSCRIPTION_COLUMNS:
+        return query.filter(compare(SUBSCRIPTION_COLUMNS[column_name], value))
+    if field in SUBSCRIPTION_COLUMNS:
+        return query.filter(cast(SUBSCRIPTION_COLUMNS[field], String).ilike("%" + value + "%"))
+    return query
+
+
+def _filter_order(field: str) -> int:
+    """Order filters as: selective equality filters, comparisons, text filters and lastly full-text searches."""
+    if field == "tsv":
+        return 3
+    if field in SUBSCRIPTION_FILTER_FUNCTIONS_BY_FIELD:
+        return 0
+    if field.rpartition("_")[2] in COMPARISON_OPERATORS_BY_SUFFIX:
+        return 1
+    return 2
+
+
 def _query_with_filters(
     response: Response,
     query: Query,
@@ -60,95 +180,53 @@ def _query_with_filters(
     filters: Optional[List[str]] = None,
 ) -> List:
     if filters is not None:
+        values_by_field: Dict[str, List[str]] = defaultdict(list)
         for filter in chunked(filters, 2):
             if filter and len(filter) == 2:
-                field = filter[0]
-                value = filter[1]
-                value_as_bool = value.lower() in ("yes", "y", "ye", "true", "1", "ja", "insync")
-                if value is not None:
-                    if field.endswith("_gt"):
-                        query = query.filter(SubscriptionTable.__dict__[field[:-3]] > value)
-                    elif field.endswith("_gte"):
-                        query = query.filter(SubscriptionTable.__dict__[field[:-4]] >= value)
-                    elif field.endswith("_lte"):
-                        query = query.filter(SubscriptionTable.__dict__[field[:-4]] <= value)
-                    elif field.endswith("_lt"):
-                        query = query.filter(SubscriptionTable.__dict__[field[:-3]] < value)
-                    elif field.endswith("_ne"):
-                        query = query.filter(SubscriptionTable.__dict__[field[:-3]] != value)
-                    elif field == "insync":
-                        query = query.filter(SubscriptionTable.insync.is_(value_as_bool))
-                    elif field == "tags":
-                        # For node and port selector form widgets
-                        sub_values = value.split("-")
-                        query = query.filter(func.lower(ProductTable.tag).in_([s.lower() for s in sub_values]))
-                    elif field == "tag":
-                        # For React table 7
-                        sub_values = value.split("-")
-                        query = query.filter(func.lower(ProductTable.tag).in_([s.lower() for s in sub_values]))
-                    elif field == "product":
-                        sub_values = value.split("-")
-                        query = query.filter(func.lower(ProductTable.name).in_([s.lower() for s in sub_values]))
-                    elif field == "status":
-                        # For React table 7
-                        statuses = value.split("-")
-                        query = query.filter(SubscriptionTable.status.in_([s.lower() for s in statuses]))
-                    elif field == "statuses":
-                        # For port subscriptions
-                        sub_values = value.split("-")
-                        query = query.filter(SubscriptionTable.status.in_([s.lower() for s in sub_values]))
-                    elif field == "organisation":
-                        try:
-                            value_as_uuid = UUID(value)
-                        except (ValueError, AttributeError):
-                            msg = "Not a valid customer_id, must be a UUID: '{value}'"
-                            logger.debug(msg)
-                            raise_status(HTTPStatus.BAD_REQUEST, msg)
-                        query = query.filter(SubscriptionTable.customer_id == value_as_uuid)
-                    elif field == "tsv":
-                        # Quote key:value tokens. This will use the FOLLOWED BY operator (https://www.postgresql.org/docs/13/textsearch-controls.html)
-                        processed_text_query = _process_text_query(value)
-
-                        logger.debug("Running full-text search query:", value=processed_text_query)
-                        # TODO: Make 'websearch_to_tsquery' into a sqlalchemy extension
-                        query = query.join(SubscriptionSearchView).filter(
-                            func.websearch_to_tsquery("simple", processed_text_query).op("@@")(
-                                SubscriptionSearchView.tsv
-                            )
-                        )
-
-                    elif field in SubscriptionTable.__dict__:
-                        query = query.filter(cast(SubscriptionTable.__dict__[field], String).ilike("%" + value + "%"))
+                field, value = filter
+                values_by_field[field].append(value)
+
+        for field in sorted(values_by_field, key=_filter_order):
+            values = values_by_field[field]
+            if field in MULTI_VALUE_FILTER_FIELDS:
+                # Combine all values of the field into a single IN clause
+                values = ["-".join(values)]
+            for value in values:
+                query = _filter_subscriptions(query, field, value)
 
     if sort is not None and len(sort) >= 2:
         for item in chunked(sort, 2):
             if item and len(item) == 2:
-                if item[0] in ["product", "tag"]:
-                    field = "name" if item[0] == "product" else "tag"
-                    if item[1].upper() == "DESC":
-                        query = query.order_by(expression.desc(ProductTable.__dict__[field]))
-                    else:
-                        query = query.order_by(expression.asc(ProductTable.__dict__[field]))
-                else:
-                    if item[1].upper() == "DESC":
-                        query = query.order_by(expression.desc(SubscriptionTable.__dict__[item[0]]))
-                    else:
-                        query = query.order_by(expression.asc(SubscriptionTable.__dict__[item[0]]))
+                column = SUBSCRIPTION_SORT_COLUMNS.get(item[0])
+                if column is None:
+                    raise_status(HTTPStatus.BAD_REQUEST, "Invalid Sort parameters")
+                sort_direction = SORT_DIRECTIONS.get(item[1].upper(), expression.asc)
+                query = query.order_by(sort_direction(column))
 
     if range is not None and len(range) == 2:
-        try:
-            range_start = int(range[0])
-            range_end = int(range[1])
-            if range_start >= range_end:
-                raise ValueError("range start must be lower than end")
-        except (ValueError, AssertionError):
+        range_start, range_end = range
+        if range_start >= range_end:
             msg = "Invalid range parameters"
-            logger.exception(msg)
+            logger.debug(msg, range=range)
             raise_status(HTTPStatus.BAD_REQUEST, msg)
-        total = query.count()
-        query = query.slice(range_start, range_end)
+
+        # Fetch the page and the total number of matching rows in a single statement by adding the count as a
+        # window column. A deterministic order is needed for stable pages, so always order on the primary key last.
+        paged_query = (
+            query.order_by(SubscriptionTable.subscription_id)
+            .add_columns(func.count().over().label("total"))
+            .slice(range_start, range_end)
+        )
+        rows = paged_query.all()
+        # A page without rows has no window count. An empty first page means there are no results at all, only a
+        # page past the end needs a separate count.
+        if rows:
+            total = rows[0].total
+        else:
+            total = query.count() if range_start > 0 else 0
 
         response.headers["Content-Range"] = f"subscriptions {range_start}-{range_end}/{total}"
+        return [row[0] for row in rows]
 
     return query.all()
 
@@ -163,8 +241,12 @@ VALID_SORT_KEYS = {
 }
 
 
-@dataclass
+# The list items are created for every listed process and never modified, so they are frozen and use __slots__
+# (dataclass(slots=True) requires Python 3.10).
+@dataclass(frozen=True)
 class ProductEnriched:
+    __slots__ = ("product_id", "description", "name", "tag", "status", "product_type")
+
     product_id: UUID
     description: str
     name: str
@@ -173,8 +255,19 @@ class ProductEnriched:
     product_type: str
 
 
-@dataclass
+@dataclass(frozen=True)
 class _Subscription:
+    __slots__ = (
+        "customer_id",
+        "description",
+        "end_date",
+        "insync",
+        "start_date",
+        "status",
+        "subscription_id",
+        "product",
+    )
+
     customer_id: UUID
     description: str
     end_date: float
@@ -185,8 +278,23 @@ class _Subscription:
     product: ProductEnriched
 
 
-@dataclass
+@dataclass(frozen=True)
 class _ProcessListItem:
+    __slots__ = (
+        "assignee",
+        "created_by",
+        "failed_reason",
+        "last_modified_at",
+        "pid",
+        "started_at",
+        "last_status",
+        "last_step",
+        "subscriptions",
+        "workflow",
+        "workflow_target",
+        "is_task",
+    )
+
     assignee: str
     created_by: Optional[str]
     failed_reason: Optional[str]
@@ -201,101 +309,174 @@ class _ProcessListItem:
     is_task: bool
 
 
-def enrich_process(p: ProcessTable) -> _ProcessListItem:
-    # p.subscriptions is a non JSON serializable AssociationProxy
-    # So we need to build a list of Subscriptions here.
-    subscriptions: List[_Subscription] = []
-    for sub in p.subscriptions:
-        prod = sub.product
-
-        subscription = _Subscription(
-            customer_id=sub.customer_id,
-            description=sub.description,
-            end_date=sub.end_date if sub.end_date else None,
-            insync=sub.insync,
-            start_date=sub.start_date if sub.start_date else None,
-            status=sub.status,
-            subscription_id=sub.subscription_id,
-            product=ProductEnriched(
-                product_id=prod.product_id,
-                description=prod.description,
-                name=prod.name,
-                tag=prod.tag,
-                status=prod.status,
-                product_type=prod.product_type,
-            ),
+# Columns of a process that are listed by the processes endpoint
+PROCESS_LIST_COLUMNS = (
+    ProcessTable.pid,
+    ProcessTable.workflow,
+    ProcessTable.assignee,
+    ProcessTable.last_status,
+    ProcessTable.last_step,
+    ProcessTable.started_at,
+    ProcessTable.last_modified_at,
+    ProcessTable.failed_reason,
+    ProcessTable.created_by,
+    ProcessTable.is_task,
+    ProcessTable.workflow_target,
+)
+
+
+def process_subscriptions_by_pid(pids: List[UUID]) -> Dict[UUID, List[_Subscription]]:
+    """Get the subscriptions, with their product, of the given processes in a single query."""
+    subscriptions: Dict[UUID, List[_Subscription]] = defaultdict(list)
+    if not pids:
+        return subscriptions
+
+    stmt = (
+        select(
+            ProcessSubscriptionTable.pid,
+            SubscriptionTable.customer_id,
+            SubscriptionTable.description,
+            SubscriptionTable.end_date,
+            SubscriptionTable.insync,
+            SubscriptionTable.start_date,
+            SubscriptionTable.status,
+            SubscriptionTable.subscription_id,
+            ProductTable.product_id,
+            ProductTable.description.label("product_description"),
+            ProductTable.name.label("product_name"),
+            ProductTable.tag.label("product_tag"),
+            ProductTable.status.label("product_status"),
+            ProductTable.product_type,
         )
-        subscriptions.append(subscription)
+        .select_from(ProcessSubscriptionTable)
+        .join(SubscriptionTable)
+        .join(ProductTable)
+        .where(ProcessSubscriptionTable.pid.in_(pids))
+        .order_by(ProcessSubscriptionTable.created_at)
+    )
 
+    for row in db.session.execute(stmt).mappings():
+        subscriptions[row["pid"]].append(
+            _Subscription(
+                customer_id=row["customer_id"],
+                description=row["description"],
+                end_date=row["end_date"] if row["end_date"] else None,
+                insync=row["insync"],
+                start_date=row["start_date"] if row["start_date"] else None,
+                status=row["status"],
+                subscription_id=row["subscription_id"],
+                product=ProductEnriched(
+                    product_id=row["product_id"],
+                    description=row["product_description"],
+                    name=row["product_name"],
+                    tag=row["product_tag"],
+                    status=row["product_status"],
+                    product_type=row["product_type"],
+                ),
+            )
+        )
+    return subscriptions
+
+
+def enrich_process(p: Mapping[str, Any], subscriptions: List[_Subscription]) -> _ProcessListItem:
+    """Build a process list item from a row with the `PROCESS_LIST_COLUMNS` and the subscriptions of the process."""
     return _ProcessListItem(
-        assignee=p.assignee,
-        created_by=p.created_by,
-        failed_reason=p.failed_reason,
-        last_modified_at=p.last_modified_at,
-        pid=p.pid,
-        started_at=p.started_at.timestamp(),
-        last_status=p.last_status,
-        last_step=p.last_step,
+        assignee=p["assignee"],
+        created_by=p["created_by"],
+        failed_reason=p["failed_reason"],
+        last_modified_at=p["last_modified_at"],
+        pid=p["pid"],
+        started_at=p["started_at"].timestamp(),
+        last_status=p["last_status"],
+        last_step=p["last_step"],
         subscriptions=subscriptions,
-        workflow=p.workflow,
-        workflow_target=first([ps.workflow_target for ps in p.process_subscriptions], None),
-        is_task=p.is_task,
+        workflow=p["workflow"],
+        workflow_target=p["workflow_target"],
+        is_task=p["is_task"],
     )
 
 
+@functools.lru_cache(maxsize=4096)
+def _split_path(path: str, sep: str) -> Tuple[str, ...]:
+    # The same paths are resolved over and over when building subscription models, so only split them once
+    return tuple(path.split(sep))
+
+
 def update_in(dct: Union[dict, list], path: str, value: Any, sep: str = ".") -> None:
     """Update a value in a dict or list based on a path."""
-    for x in path.split(sep):
+    for x in _split_path(path, sep):
         prev: Union[dict, list]
         if x.isdigit() and isinstance(dct, list):
             prev = dct
             dct = dct[int(x)]
         else:
             prev = dct
-            dct = dict(dct).setdefault(x, {})
+            dct = dct.setdefault(x, {})  # type: ignore
     prev[x] = value  # type: ignore
 
 
 def get_in(dct: Union[dict, list], path: str, sep: str = ".") -> Any:
     """Get a value in a dict or list using the path and get the resulting key's value."""
     prev: Union[dict, list]
-    for x in path.split(sep):
+    for x in _split_path(path, sep):
         if x.isdigit() and isinstance(dct, list):
             prev, dct = dct, dct[int(x)]
         else:
-            prev, dct = dct, dict(dct).get(x)  # type: ignore
+            prev, dct = dct, dct.get(x)  # type: ignore
     return prev[x]  # type: ignore
 
 
 def getattr_in(obj: Any, attr: str) -> Any:
     """Get an instance attribute value by path."""
-
-    def _getattr(obj: object, attr: str) -> Any:
+    for name in _split_path(attr, "."):
         if isinstance(obj, list):
-            return obj[int(attr)]
+            obj = obj[int(name)]
+        elif isinstance(obj, dict):
+            obj = obj.get(name)
+        else:
+            obj = getattr(obj, name, None)
+    return obj
 
-        if isinstance(obj, dict):
-            return obj.get(attr)
 
-        return getattr(obj, attr, None)
+def _block_items(block: Union[dict, BaseModel], models_are_blocks: bool) -> Iterator[Tuple[str, Any, bool]]:
+    """Yield the (key, value, models_are_blocks) items of a block as they would appear in `SubscriptionModel.dict()`.
 
-    return functools.reduce(_getattr, [obj] + attr.split("."))
+    Pydantic converts nested models in field values to dicts, but `DomainModel.dict()` adds its serializable properties
+    as they are. So models are only considered blocks when they are not nested in such a property.
+    """
+    if isinstance(block, dict):
+        for key, value in block.items():
+            yield key, value, models_are_blocks
+        return
+
+    for name in block.__fields__:
+        yield name, getattr(block, name), True
+    if isinstance(block, DomainModel):
+        for prop in block.get_properties():
+            yield prop, getattr(block, prop), False
 
 
 def product_block_paths(subscription: Union[SubscriptionModel, dict]) -> List[str]:
-    _subscription = subscription.dict() if isinstance(subscription, SubscriptionModel) else subscription
-
-    def get_dict_items(d: dict) -> Generator:
-        for k, v in d.items():
-            if isinstance(v, dict):
-                for k1, v1 in get_dict_items(v):
-                    yield (f"{k}.{k1}", v1)
-                yield (k, v)
-            if isinstance(v, list):
-                for index, list_item in enumerate(v):
-                    if isinstance(list_item, dict):
-                        for list_item_key, list_item_value in get_dict_items(list_item):
-                            yield (f"{k}.{index}.{list_item_key}", list_item_value)
-                        yield (f"{k}.{index}", list_item)
-
-    return [path for path, value in get_dict_items(_subscription)]
+    # Walk the subscription depth first with an explicit stack of (path, items, is_block) frames. A block's path is
+    # added when its frame is exhausted, so after the paths of the blocks nested in it. A SubscriptionModel is walked
+    # through its fields, which gives the same paths as its dict() without converting the whole model.
+    paths: List[str] = []
+    stack: List[Tuple[str, Iterator[Tuple[Any, Any, bool]], bool]] = [
+        ("", _block_items(subscription, isinstance(subscription, SubscriptionModel)), True)
+    ]
+    while stack:
+        prefix, items, is_block = stack[-1]
+        for key, value, models_are_blocks in items:
+            path = f"{prefix}.{key}" if prefix else key
+            if isinstance(value, dict) or (models_are_blocks and isinstance(value, BaseModel)):
+                stack.append((path, _block_items(value, models_are_blocks), True))
+                break
+            if is_block and isinstance(value, list):
+                stack.append((path, ((str(i), v, models_are_blocks) for i, v in enumerate(value)), False))
+                break
+        else:
+            stack.pop()
+            if is_block and prefix:
+                paths.append(prefix)
+
+    return paths
@@ -16,10 +16,10 @@ from typing import Callable
 from uuid import UUID
 
 import structlog
-from sqlalchemy import String, cast
+from sqlalchemy import String, cast, select
 
 from orchestrator.api.error_handling import raise_status
-from orchestrator.db import ProcessSubscriptionTable, ProcessTable, ProductTable, SubscriptionTable, db
+from orchestrator.db import ProcessSubscriptionTable, ProcessTable, ProductTable, SubscriptionTable
 from orchestrator.db.database import SearchQuery
 from orchestrator.db.filters.filters import generic_filter
 
@@ -62,53 +62,49 @@ def organisation_filter(query: SearchQuery, value: str) -> SearchQuery:
         raise_status(HTTPStatus.BAD_REQUEST, msg)
 
     process_subscriptions = (
-        db.session.query(ProcessSubscriptionTable)
+        select(ProcessSubscriptionTable.pid)
         .join(SubscriptionTable)
-        .filter(SubscriptionTable.customer_id == value_as_uuid)
-        .subquery()
+        .where(SubscriptionTable.customer_id == value_as_uuid)
     )
-    return query.filter(ProcessTable.pid == process_subscriptions.c.pid)
+    return query.filter(ProcessTable.pid.in_(process_subscriptions))
 
 
 def product_filter(query: SearchQuery, value: str) -> SearchQuery:
     process_subscriptions = (
-        db.session.query(ProcessSubscriptionTable)
-        .join(SubscriptionTable, ProductTable)
-        .filter(ProductTable.name.ilike("%" + value + "%"))
-        .subquery()
+        select(ProcessSubscriptionTable.pid)
+        .join(SubscriptionTable)
+        .join(ProductTable)
+        .where(ProductTable.name.ilike("%" + value + "%"))
     )
-    return query.filter(ProcessTable.pid == process_subscriptions.c.pid)
+    return query.filter(ProcessTable.pid.in_(process_subscriptions))
 
 
 def tag_filter(query: SearchQuery, value: str) -> SearchQuery:
     tags = value.split("-")
     process_subscriptions = (
-        db.session.query(ProcessSubscriptionTable)
-        .join(SubscriptionTable, ProductTable)
-        .filter(ProductTable.tag.in_(tags))
-        .subquery()
+        select(ProcessSubscriptionTable.pid)
+        .join(SubscriptionTable)
+        .join(ProductTable)
+        .where(ProductTable.tag.in_(tags))
     )
-    return query.filter(ProcessTable.pid == process_subscriptions.c.pid)
+    return query.filter(ProcessTable.pid.in_(process_subscriptions))
 
 
 def subscriptions_filter(query: SearchQuery, value: str) -> SearchQuery:
     process_subscriptions = (
-        db.session.query(ProcessSubscriptionTable)
+        select(ProcessSubscriptionTable.pid)
         .join(SubscriptionTable)
-        .filter(SubscriptionTable.description.ilike("%" + value + "%"))
-        .subquery()
+        .where(SubscriptionTable.description.ilike("%" + value + "%"))
     )
-    return query.filter(ProcessTable.pid == process_subscriptions.c.pid)
+    return query.filter(ProcessTable.pid.in_(process_subscriptions))
 
 
 def target_filter(query: SearchQuery, value: str) -> SearchQuery:
     targets = value.split("-")
-    process_subscriptions = (
-        db.session.query(ProcessSubscriptionTable)
-        .filter(ProcessSubscriptionTable.workflow_target.in_(targets))
-        .subquery()
+    process_subscriptions = select(ProcessSubscriptionTable.pid).where(
+        ProcessSubscriptionTable.workflow_target.in_(targets)
     )
-    return query.filter(ProcessTable.pid == process_subscriptions.c.pid)
+    return query.filter(ProcessTable.pid.in_(process_subscriptions))
 
 
 VALID_FILTER_FUNCTIONS_BY_COLUMN: dict[str, Callable[[SearchQuery, str], SearchQuery]] = {
@@ -31,6 +31,7 @@ from sqlalchemy import (
     Table,
     Text,
     TypeDecorator,
+    select,
     text,
 )
 from sqlalchemy.dialects import postgresql as pg
@@ -38,7 +39,7 @@ from sqlalchemy.engine import Dialect
 from sqlalchemy.exc import DontWrapMixin
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.ext.orderinglist import ordering_list
-from sqlalchemy.orm import backref, deferred, object_session, relationship
+from sqlalchemy.orm import backref, column_property, deferred, object_session, relationship
 from sqlalchemy.schema import UniqueConstraint
 from sqlalchemy_utils import TSVectorType, UUIDType
 
@@ -129,6 +130,18 @@ processes_subscriptions_ix = Index(
     "processes_subscriptions_ix", ProcessSubscriptionTable.pid, ProcessSubscriptionTable.subscription_id
 )
 
+# Expose the workflow target of the oldest process subscription on the process itself, so listing processes doesn't
+# require loading all process_subscriptions. Deferred, so only queries that undefer it pay for the subquery.
+ProcessTable.workflow_target = column_property(
+    select(ProcessSubscriptionTable.workflow_target)
+    .where(ProcessSubscriptionTable.pid == ProcessTable.pid)
+    .order_by(ProcessSubscriptionTable.created_at)
+    .limit(1)
+    .correlate_except(ProcessSubscriptionTable)
+    .scalar_subquery(),
+    deferred=True,
+)
+
 product_product_block_association = Table(
     "product_product_blocks",
     BaseModel.metadata,
@@ -583,7 +583,7 @@ def build_extended_domain_model(subscription_model: SubscriptionModel) -> dict:
     ).all()
 
     subscription = subscription_model.dict()
-    paths = product_block_paths(subscription)
+    paths = product_block_paths(subscription_model)
 
     def inject_in_use_by_ids(path_to_block: str) -> None:
         if not (in_use_by_subs := getattr_in(subscription_model, f"{path_to_block}.in_use_by")):
@@ -1,6 +1,25 @@
 import pytest
 
-from orchestrator.api.helpers import getattr_in, product_block_paths, update_in
+from orchestrator.api.helpers import _process_text_query, get_in, getattr_in, product_block_paths, update_in
+from orchestrator.domain.base import SubscriptionModel
+
+
+@pytest.mark.parametrize(
+    "subscription_fixture",
+    [
+        "sub_one_subscription_1",
+        "sub_two_subscription_1",
+        "sub_list_union_overlap_subscription_1",
+        "product_sub_list_union_subscription_1",
+        "product_one_subscription_1",
+    ],
+)
+def test_product_block_paths_model_and_dict_are_equal(subscription_fixture, request):
+    subscription = request.getfixturevalue(subscription_fixture)
+    if not isinstance(subscription, SubscriptionModel):
+        subscription = SubscriptionModel.from_subscription(subscription)
+
+    assert product_block_paths(subscription) == product_block_paths(subscription.dict())
 
 
 def test_product_block_paths(sub_list_union_overlap_subscription_1):
@@ -21,6 +40,17 @@ def test_product_block_paths(sub_list_union_overlap_subscription_1):
     )
 
 
+def test_product_block_paths_nested_dict():
+    subscription = {
+        "a": 1,
+        "b": {"c": {"d": 1}, "e": [{"f": {}}, 1, [{"g": {}}]]},
+        "h": [{"i": [{"j": {}}]}],
+    }
+
+    # Scalars and lists nested directly in lists are not product blocks
+    assert product_block_paths(subscription) == ["b.c", "b.e.0.f", "b.e.0", "b", "h.0.i.0.j", "h.0.i.0", "h.0"]
+
+
 class BasicObject:
     def __init__(self, **kwargs) -> None:
         self.__dict__.update(kwargs)
@@ -58,21 +88,9 @@ def test_getattr_in(input_object, path, expected_result):
     "input_dict,path,value,expected_result",
     [
         pytest.param({}, "foo", "bar", {"foo": "bar"}),
-        pytest.param(
-            {},
-            "foo.x",
-            "bar",
-            {"foo": {"x": "bar"}},
-            marks=[pytest.mark.xfail(reason="Intermediate dicts not created")],
-        ),
+        pytest.param({}, "foo.x", "bar", {"foo": {"x": "bar"}}),
         pytest.param({"foo": {}}, "foo.x", "bar", {"foo": {"x": "bar"}}),
-        pytest.param(
-            {},
-            "foo.x.y",
-            "bar",
-            {"foo": {"x": {"y": "bar"}}},
-            marks=[pytest.mark.xfail(reason="Intermediate dicts not created")],
-        ),
+        pytest.param({}, "foo.x.y", "bar", {"foo": {"x": {"y": "bar"}}}),
         pytest.param({"foo": "bar"}, "fizz", "buzz", {"foo": "bar", "fizz": "buzz"}),
         pytest.param(
             {"foo": ["bar"]}, "foo.0", "buzz", {"foo": ["buzz"]}, marks=[pytest.mark.xfail(reason="Raises TypeError")]
@@ -83,3 +101,38 @@ def test_update_in(input_dict, path, value, expected_result):
     # TODO fix the failing scenarios
     assert update_in(input_dict, path, value) is None
     assert input_dict == expected_result
+
+
+@pytest.mark.parametrize(
+    "input_dict,path,expected_result",
+    [
+        ({"foo": "bar"}, "foo", "bar"),
+        ({"foo": {"bar": {"fizz": "buzz"}}}, "foo.bar.fizz", "buzz"),
+        ({"foo": {"bar": {"fizz": "buzz"}}}, "foo.bar", {"fizz": "buzz"}),
+        ({"foo": [{"bar": "a"}, {"bar": "b"}]}, "foo.1.bar", "b"),
+    ],
+)
+def test_get_in(input_dict, path, expected_result):
+    assert get_in(input_dict, path) == expected_result
+
+
+@pytest.mark.parametrize(
+    "query,expected_result",
+    [
+        ("foo", "foo"),
+        ("foo bar", "foo bar"),
+        (" foo  bar ", "foo bar"),
+        ("foo\tbar\r\n", "foo bar"),
+        ("foo\xa0bar", "foo\xa0bar"),  # shlex only splits on ASCII whitespace
+        ("foo\u2003 bar", "foo\u2003 bar"),
+        ("foo #bar", "foo"),
+        ("status:active", '"status:active"'),
+        ("foo status:active", 'foo "status:active"'),
+        ('"foo bar"', '"foo bar"'),
+        ('"foo bar', '"foo bar"'),
+    ],
+)
+def test_process_text_query(query, expected_result):
+    assert _process_text_query(query) == expected_result
+    # A second call is served from the cache and must give the same result
+    assert _process_text_query(query) == expected_result
@@ -403,6 +403,23 @@ def test_processes_filterable(test_client, mocked_processes, generic_subscriptio
     assert 2 == len(response.json())
 
 
+def test_processes_filterable_process_with_multiple_matching_subscriptions(
+    test_client, mocked_processes, generic_subscription_2, generic_subscription_1
+):
+    # Give the first process (on generic_subscription_1) a second subscription of the same customer
+    pid = mocked_processes[0]
+    db.session.add(ProcessSubscriptionTable(pid=pid, subscription_id=generic_subscription_2))
+    db.session.commit()
+
+    for process_filter in [f"organisation,{CUSTOMER_ID}", "target,CREATE"]:
+        response = test_client.get(f"/api/processes?filter={process_filter}&range=0,20")
+        assert HTTPStatus.OK == response.status_code
+        pids = [process["pid"] for process in response.json()]
+        assert len(pids) == len(set(pids)) == 7
+        assert response.headers["Content-Range"] == "processes 0-20/7"
+        assert len(next(process for process in response.json() if process["pid"] == str(pid))["subscriptions"]) == 2
+
+
 def test_processes_filterable_response_model(
     test_client, mocked_processes, generic_subscription_2, generic_subscription_1
 ):
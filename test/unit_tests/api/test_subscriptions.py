@@ -592,6 +592,10 @@ def test_filtering_subscriptions(seed, test_client):
     assert response.status_code == HTTPStatus.OK
     assert len(response.json()) == 1
 
+    response = test_client.get("/api/subscriptions?filter=status,active,status,provisioning")
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.json()) == 6
+
     response = test_client.get("/api/subscriptions?filter=status_gt,active")
     assert response.status_code == HTTPStatus.OK
     assert len(response.json()) == 2
@@ -608,6 +612,10 @@ def test_filtering_subscriptions(seed, test_client):
     assert response.status_code == HTTPStatus.OK
     assert len(response.json()) == 6
 
+    response = test_client.get("/api/subscriptions?filter=status_ne,active")
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.json()) == 2
+
     response = test_client.get("/api/subscriptions?filter=status,active,product,LightPathProduct")
     assert response.status_code == HTTPStatus.OK
     assert len(response.json()) == 1
@@ -617,6 +625,33 @@ def test_filtering_subscriptions(seed, test_client):
     assert len(response.json()) == 2
 
 
+def test_full_text_filtering_subscriptions(seed, test_client):
+    db.session.execute("REFRESH MATERIALIZED VIEW subscriptions_search")
+
+    response = test_client.get("/api/subscriptions?filter=tsv,status:active")
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.json()) == 5
+
+    response = test_client.get("/api/subscriptions?filter=description,desc,tsv,status:active")
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.json()) == 5
+
+
+def test_substring_filtering_subscriptions(seed, test_client):
+    subscription = SubscriptionTable.query.get(PORT_A_SUBSCRIPTION_ID)
+    subscription.description = "Customer lightpath Amsterdam"
+    db.session.commit()
+
+    for value in ["Amsterdam", "lightpath", "Amster", "Customer light"]:
+        response = test_client.get(f"/api/subscriptions?filter=description,{value}")
+        assert response.status_code == HTTPStatus.OK
+        assert [sub["subscription_id"] for sub in response.json()] == [PORT_A_SUBSCRIPTION_ID]
+
+    response = test_client.get(f"/api/subscriptions?filter=subscription_id,{PORT_A_SUBSCRIPTION_ID[:13]}")
+    assert response.status_code == HTTPStatus.OK
+    assert [sub["subscription_id"] for sub in response.json()] == [PORT_A_SUBSCRIPTION_ID]
+
+
 def test_sorting_subscriptions(seed, test_client):
     response = test_client.get("/api/subscriptions?sort=status,asc")
     assert response.status_code == HTTPStatus.OK
@@ -654,12 +689,28 @@ def test_sorting_subscriptions(seed, test_client):
     assert response.json()[0]["product"]["name"] == "PortBProduct"
     assert response.json()[6]["product"]["name"] == "INVALID_PRODUCT"
 
+    response = test_client.get("/api/subscriptions?sort=instances,asc")
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
 
 def test_range_subscriptions(seed, test_client):
     response = test_client.get("/api/subscriptions?range=0,3")
 
     assert response.status_code == HTTPStatus.OK
     assert len(response.json()) == 3
+    assert response.headers["Content-Range"] == "subscriptions 0-3/7"
+
+    response = test_client.get("/api/subscriptions?range=10,20")
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.json()) == 0
+    assert response.headers["Content-Range"] == "subscriptions 10-20/7"
+
+    response = test_client.get("/api/subscriptions?filter=status,terminated&range=0,10")
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.json()) == 0
+    assert response.headers["Content-Range"] == "subscriptions 0-10/0"
 
     response = test_client.get("/api/subscriptions?sort=status,asc&range=5,5")
     assert response.status_code == HTTPStatus.BAD_REQUEST